@@ -1,3 +1,6 @@
+import os
+import tempfile
+import threading
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
@@ -23,6 +26,11 @@ UI_SHARED_FILES = {
     "logo-sofinco.png": UI_CHAT_DIR / "logo-sofinco.png",
     "md5.html": UI_CHAT_DIR / "md5.html",
 }
+# Source (st_mtime_ns, st_size) each extract was produced from, keyed by output path.
+# Bounded because callers choose the page ranges; the oldest entries are evicted first.
+MAX_EXTRACT_SOURCES = 1024
+_EXTRACT_SOURCES: dict[Path, tuple[int, int]] = {}
+_EXTRACT_SOURCES_LOCK = threading.Lock()
 
 
 def _ui_file_response(file_path: Path) -> FileResponse:
@@ -32,10 +40,11 @@ def _ui_file_response(file_path: Path) -> FileResponse:
 
 
 def _safe_pdf_name(filename: str) -> str:
-    safe_filename = Path(filename).name
+    file_path = Path(filename)
+    safe_filename = file_path.name
     if safe_filename != filename:
         raise HTTPException(status_code=400, detail="Invalid filename")
-    if Path(safe_filename).suffix.lower() != ".pdf":
+    if file_path.suffix.lower() != ".pdf":
         raise HTTPException(status_code=400, detail="Only .pdf files are allowed")
     return safe_filename
 
@@ -50,12 +59,41 @@ def _find_pdf_path(filename: str) -> Path:
     raise HTTPException(status_code=404, detail="PDF file not found")
 
 
+def _source_signature(source_path: Path) -> tuple[int, int]:
+    stat = source_path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _is_fresh_extract(source_path: Path, output_path: Path) -> bool:
+    source_signature = _source_signature(source_path)
+    output_exists = output_path.is_file()
+    with _EXTRACT_SOURCES_LOCK:
+        if output_exists and _EXTRACT_SOURCES.get(output_path) == source_signature:
+            return True
+        _EXTRACT_SOURCES.pop(output_path, None)
+        return False
+
+
+def _remember_extract(output_path: Path, source_signature: tuple[int, int]) -> None:
+    with _EXTRACT_SOURCES_LOCK:
+        _EXTRACT_SOURCES.pop(output_path, None)
+        while len(_EXTRACT_SOURCES) >= MAX_EXTRACT_SOURCES:
+            del _EXTRACT_SOURCES[next(iter(_EXTRACT_SOURCES))]
+        _EXTRACT_SOURCES[output_path] = source_signature
+
+
 def _extract_pdf_range(source_path: Path, start_page: int, end_page: int) -> Path:
     if start_page < 1 or end_page < 1:
         raise HTTPException(status_code=400, detail="Pages must be >= 1")
     if start_page > end_page:
         raise HTTPException(status_code=400, detail="startPage must be <= endPage")
 
+    output_path = source_path.with_name(f"{source_path.stem}_p{start_page}-{end_page}.pdf")
+    if _is_fresh_extract(source_path, output_path):
+        return output_path
+
+    source_signature = _source_signature(source_path)
+
     with source_path.open("rb") as source_file:
         reader = PdfFileReader(source_file)
         page_count = len(reader.pages)
@@ -66,21 +104,38 @@ def _extract_pdf_range(source_path: Path, start_page: int, end_page: int) -> Pat
             detail=f"endPage exceeds PDF page count ({page_count})",
         )
 
-    output_path = source_path.with_name(f"{source_path.stem}_p{start_page}-{end_page}.pdf")
+    # pdf_copy writes in place and leaves partial output on failure, so extract
+    # to a temp file and only move it onto output_path once it is complete.
+    fd, tmp_name = tempfile.mkstemp(
+        dir=output_path.parent,
+        prefix=f".{output_path.stem}.",
+        suffix=".pdf.tmp",
+    )
+    os.close(fd)
+    tmp_path = Path(tmp_name)
 
     try:
-        pdf_copy(
-            input=str(source_path),
-            output=str(output_path),
-            pages=[f"{start_page}-{end_page}"],
-            yes_to_all=True,
-        )
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=500, detail="Failed to extract PDF pages") from exc
-
-    if not output_path.is_file():
-        raise HTTPException(status_code=500, detail="Extracted PDF was not created")
-
+        try:
+            pdf_copy(
+                input=str(source_path),
+                output=str(tmp_path),
+                pages=[f"{start_page}-{end_page}"],
+                yes_to_all=True,
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise HTTPException(status_code=500, detail="Failed to extract PDF pages") from exc
+
+        if not tmp_path.is_file() or tmp_path.stat().st_size == 0:
+            raise HTTPException(status_code=500, detail="Extracted PDF was not created")
+
+        # mkstemp creates the file as 0600; give the extract the source's read/write
+        # bits so the n8n container sharing n8n_files can still read it.
+        os.chmod(tmp_path, source_path.stat().st_mode & 0o666)
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    _remember_extract(output_path, source_signature)
     return output_path
 
 